@@ -13,6 +13,22 @@ Usage
 s3insync pull --exclude '*/__pycache__/*' s3://bucket/prefix ./localdir
 ```
 
+The reverse direction is also supported, incrementally uploading a local
+directory to S3.  Large files are uploaded in parallel parts.
+
+```bash
+s3insync push --exclude '*/__pycache__/*' ./localdir s3://bucket/prefix
+```
+
+To sync once and exit, e.g. to pre-seed a volume from an init container, pass
+`--once`.  A throughput summary is printed at the end, and the exit status is
+`0` if everything synced, `1` if any file failed and `2` if the sync couldn't
+complete at all.
+
+```bash
+s3insync pull --once s3://bucket/prefix ./localdir
+```
+
 When running in daemon mode, a prometheus metrics endpoint is served at
 `:8087/metrics`.
 """
@@ -1,7 +1,6 @@
+import importlib
 import logging
 
-import s3insync.cmd.pull as pull
-
 
 def main():
     import argparse
@@ -22,8 +21,29 @@ def main():
     parser_pull.add_argument('-e', '--exclude', action='append', help='Files to exclude from syncing or deleting', default=[])
 
     parser_pull.add_argument('-i', '--interval', type=int, default=300, help='Interval between syncing')
+    parser_pull.add_argument('-w', '--workers', type=int, default=8, help='Number of files to transfer in parallel')
+    parser_pull.add_argument('--once', action='store_true', default=False,
+                             help='Sync once and exit, non-zero if anything failed, instead of running as a daemon')
+    parser_pull.add_argument('--profile', action='store_true', default=False,
+                             help='Toggle a sampling profiler on SIGUSR1, writing profiles to the staging directory')
+    parser_pull.add_argument('--slow-threshold', type=float, default=None,
+                             help='Log operations which take longer than this many seconds')
+    parser_pull.add_argument('--debug-entries-per-second', type=float, default=100,
+                             help='Maximum rate of per-entry debug logs')
+
+    parser_pull.set_defaults(func=command('pull'))
+
+    parser_push = subparsers.add_parser('push', help='push regularly from the local filesystem to s3')
+
+    parser_push.add_argument('localpath', help="Path to sync from")
+    parser_push.add_argument('s3uri', help="URI of the S3 repo")
+
+    parser_push.add_argument('-e', '--exclude', action='append', help='Files to exclude from syncing or deleting', default=[])
 
-    parser_pull.set_defaults(func=pull.run)
+    parser_push.add_argument('-i', '--interval', type=int, default=300, help='Interval between syncing')
+    parser_push.add_argument('-w', '--workers', type=int, default=8, help='Number of files to transfer in parallel')
+
+    parser_push.set_defaults(func=command('push'))
 
     args = parser.parse_args()
 
@@ -36,6 +56,14 @@ def main():
     args.func(args)
 
 
+def command(name: str):
+    # Subcommands pull in boto3 and prometheus_client, so only import the one being run
+    def run(args):
+        return importlib.import_module(f's3insync.cmd.{name}').run(args)
+
+    return run
+
+
 def setup_logging(level):
     logging.basicConfig(level=level)
 
@@ -1,6 +1,7 @@
 import logging
 import os
 import os.path
+import sys
 import threading
 import time
 import typing as t
@@ -9,6 +10,7 @@ import signal
 import prometheus_client as pc
 
 import s3insync
+import s3insync.profiling as profiling
 import s3insync.repositories as r
 import s3insync.sync_decider as sd
 
@@ -16,10 +18,13 @@ logger = logging.getLogger()
 
 
 def run(args):
+    if args.once:
+        sys.exit(run_once(args))
+
     s3uri = args.s3uri
     localpath = args.localpath
-    excludes = args.exclude
     interval = args.interval
+    workers = args.workers
 
     i = pc.Info('s3insync_version', 'Version and config information for the client')
     i.info({'version': s3insync.__version__, 'aws_repo': s3uri, 'localpath': localpath, })
@@ -33,10 +38,11 @@ def run(args):
 
     pc.start_http_server(8087)
     src = r.S3Repo('s3', s3uri)
-    dest = r.LocalFSRepo('fs', localpath, os.path.join(os.getenv('HOME'), ".s3insync"))
+    dest = r.LocalFSRepo('fs', localpath, staging_path())
     dest.ensure_directories()
 
-    sync = sd.SyncDecider(excludes)
+    sync = make_decider(args)
+    profiler = setup_profiler(args)
 
     set_exit = setup_signals()
 
@@ -45,7 +51,7 @@ def run(args):
         start = time.monotonic()
 
         try:
-            success, failures = sync.execute_sync(src, dest)
+            success, failures = sync.execute_sync(src, dest, workers=workers)
             files_in_s3.set(success.pop('total', 0))
             set_op_counts(success, op_count)
             set_op_counts(failures, failed_op_count)
@@ -58,6 +64,60 @@ def run(args):
 
         set_exit.wait(max(30, interval - duration))
 
+    if profiler is not None:
+        profiler.stop()
+
+
+def run_once(args) -> int:
+    # Exit status: 0 if everything synced, 1 if any operation failed, 2 if the sync couldn't complete at all
+    try:
+        src = r.S3Repo('s3', args.s3uri)
+        dest = r.LocalFSRepo('fs', args.localpath, staging_path())
+        dest.ensure_directories()
+    except Exception:
+        logger.exception("Failed to set up sync")
+        return 2
+
+    sync = make_decider(args)
+    profiler = setup_profiler(args)
+    progress = sd.Progress()
+
+    try:
+        _success, failures = sync.execute_sync(src, dest, workers=args.workers, progress=progress)
+    except Exception:
+        logger.exception("Failed to excute sync")
+        return 2
+    finally:
+        if profiler is not None:
+            profiler.stop()
+
+    progress.finish()
+    print(progress.summary())
+
+    if failures:
+        logger.error("Sync finished with failures: %r", failures)
+        return 1
+    return 0
+
+
+def make_decider(args) -> sd.SyncDecider:
+    return sd.SyncDecider(args.exclude, slow_threshold=args.slow_threshold,
+                          entry_logs_per_second=args.debug_entries_per_second)
+
+
+def setup_profiler(args) -> t.Optional[profiling.SignalProfiler]:
+    if not args.profile:
+        return None
+
+    profiler = profiling.SignalProfiler(staging_path())
+    profiler.install()
+    logger.info("Send SIGUSR1 to pid %d to start or stop profiling", os.getpid())
+    return profiler
+
+
+def staging_path() -> str:
+    return os.path.join(os.getenv('HOME'), ".s3insync")
+
 
 def set_op_counts(items: t.Dict[str, int], metric: pc.Counter):
     for typ, count in items.items():
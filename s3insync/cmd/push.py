@@ -0,0 +1,64 @@
+import logging
+import os
+import os.path
+import sys
+import time
+
+import prometheus_client as pc
+
+import s3insync
+import s3insync.repositories as r
+import s3insync.sync_decider as sd
+from s3insync.cmd.pull import set_op_counts, setup_signals, staging_path
+
+logger = logging.getLogger()
+
+
+def run(args):
+    s3uri = args.s3uri
+    localpath = args.localpath
+    excludes = args.exclude
+    interval = args.interval
+    workers = args.workers
+
+    # An empty source would delete everything under the prefix, so refuse to start rather than guess
+    if not os.path.isdir(localpath):
+        logger.error("Local path %r is not a directory", localpath)
+        sys.exit(1)
+
+    i = pc.Info('s3insync_version', 'Version and config information for the client')
+    i.info({'version': s3insync.__version__, 'aws_repo': s3uri, 'localpath': localpath, })
+    start_time = pc.Gauge('s3insync_start_time', 'Time the sync process was started')
+    start_time.set_to_current_time()
+
+    last_sync = pc.Gauge('s3insync_last_sync_time', 'Time the last sync completed')
+    op_count = pc.Counter('s3insync_operations', 'Count of operations', labelnames=('type',))
+    failed_op_count = pc.Counter('s3insync_failed_operations', 'Count of failed operations', labelnames=('type',))
+    files_local = pc.Gauge('s3insync_files_local', 'Number of files in the local directory',)
+
+    pc.start_http_server(8087)
+    src = r.LocalFSRepo('fs', localpath, staging_path())
+    dest = r.S3Repo('s3', s3uri)
+
+    sync = sd.SyncDecider(excludes)
+
+    set_exit = setup_signals()
+
+    while not set_exit.is_set():
+        logger.debug("Starting sync")
+        start = time.monotonic()
+
+        try:
+            src.rescan()
+            success, failures = sync.execute_sync(src, dest, workers=workers)
+            files_local.set(success.pop('total', 0))
+            set_op_counts(success, op_count)
+            set_op_counts(failures, failed_op_count)
+            last_sync.set_to_current_time()
+        except Exception:
+            logger.exception("Failed to excute sync")
+
+        duration = time.monotonic() - start
+        logger.debug("Stopping sync after %g secs", duration)
+
+        set_exit.wait(max(30, interval - duration))
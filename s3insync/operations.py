@@ -1,4 +1,5 @@
 import dataclasses as dc
+import typing as t
 
 
 @dc.dataclass()
@@ -6,11 +7,13 @@ class Copy:
     path: str
     from_repo: object
     to_repo: object
+    size: t.Optional[int] = dc.field(default=None, init=False, compare=False)
 
     name = "copy"
 
     def execute(self):
         with self.from_repo.contents(self.path) as contents:
+            self.size = contents.size
             return self.to_repo.write(contents)
 
 
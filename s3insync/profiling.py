@@ -0,0 +1,75 @@
+import collections
+import logging
+import os
+import os.path
+import signal
+import sys
+import threading
+import time
+import typing as t
+
+
+log = logging.getLogger(__name__)
+
+
+class SignalProfiler:
+    # Samples the stacks of every thread, so time spent in transfer workers shows up as well as the main thread.
+    # Profiles are written in the collapsed stack format understood by flamegraph.pl and speedscope.
+    def __init__(self, directory: str, interval=0.01):
+        self.directory = directory
+        self.interval = interval
+        self.sampler = None
+        self.stacks = collections.Counter()
+        self._stop = threading.Event()
+
+    def install(self, signame='SIGUSR1'):
+        signal.signal(getattr(signal, signame), self.toggle)
+
+    def toggle(self, _signo=None, _frame=None):
+        if self.sampler is None:
+            self.start()
+        else:
+            self.stop()
+
+    def start(self):
+        log.info("Starting profiler")
+        self.stacks = collections.Counter()
+        self._stop = threading.Event()
+        self.sampler = threading.Thread(target=self.sample, name='s3insync-profiler', daemon=True)
+        self.sampler.start()
+
+    def sample(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != own:
+                    self.stacks[(names.get(ident, str(ident)), ) + stack(frame)] += 1
+
+    def stop(self):
+        if self.sampler is None:
+            return None
+
+        self._stop.set()
+        self.sampler.join()
+        self.sampler = None
+
+        path = os.path.join(self.directory, f"s3insync-{os.getpid()}-{time.strftime('%Y%m%dT%H%M%S')}.stacks")
+        try:
+            with open(path, "w") as f:
+                for frames, count in self.stacks.most_common():
+                    f.write(f"{';'.join(frames)} {count}\n")
+            log.info("Wrote profile of %d samples to %r", sum(self.stacks.values()), path)
+        except OSError:
+            log.exception("Problem writing profile to %r", path)
+            path = None
+        return path
+
+
+def stack(frame) -> t.Tuple[str, ...]:
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return tuple(reversed(frames))
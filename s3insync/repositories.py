@@ -1,3 +1,5 @@
+import collections
+import concurrent.futures as cf
 import dataclasses as dc
 import hashlib
 import logging
@@ -7,11 +9,22 @@ import typing as t
 import urllib.parse as up
 import shutil
 
-import boto3
-
 
 log = logging.getLogger(__name__)
 
+MB = 1024 * 1024
+
+# Metadata key holding the plain md5 of an object we uploaded.  Multipart
+# uploads get an ETag which isn't the md5 of the content, so this lets the two
+# sides of a sync still compare like with like.
+MD5_METADATA_KEY = 's3insync-md5'
+
+DEFAULT_TRANSFER_SETTINGS = {
+    'multipart_threshold': 8 * MB,
+    'multipart_chunksize': 8 * MB,
+    'max_concurrency': 10,
+}
+
 
 @dc.dataclass(frozen=True)
 class Entry:
@@ -24,6 +37,7 @@ class Contents:
     path: str
     content_id: str
     body: object
+    size: t.Optional[int] = None
 
     def __getattr__(self, name: str):
         if hasattr(self.body, name):
@@ -36,8 +50,23 @@ class Contents:
         self.close()
 
 
+def is_multipart(etag: str) -> bool:
+    return '-' in etag
+
+
+def metadata_content_id(etag: str, metadata: t.Dict[str, str]) -> str:
+    # Listing and reading an object have to agree on its content id, or it would be copied on every sync.  Only
+    # multipart ETags are swapped for the stored md5; a single part ETag is used as is, even if it isn't an md5
+    # (e.g. under SSE-KMS), as that's all a listing can see without a request per object.
+    if is_multipart(etag):
+        return metadata.get(MD5_METADATA_KEY, etag)
+    return etag
+
+
 class S3Repo:
-    def __init__(self, name: str, uri: str, client=None, maxkeys=1000):
+    max_delete_keys = 1000
+
+    def __init__(self, name: str, uri: str, client=None, maxkeys=1000, transfer_config=None):
         self.name = name
         self.uri = uri
         parsed = up.urlparse(self.uri)
@@ -46,13 +75,29 @@ class S3Repo:
 
         if not self.prefix.endswith('/'):
             self.prefix = self.prefix + "/"
-        if client is None:
-            self.client = boto3.client('s3')
-        else:
-            self.client = client
+        # boto3 is slow to import and to build a client, so both wait until the repo is first used
+        self._client = client
         self.maxkeys = maxkeys
+        self._transfer_config = transfer_config
+        self._entries = {}
+        self._multipart_ids = {}
+
+    @property
+    def client(self):
+        if self._client is None:
+            import boto3
+            self._client = boto3.client('s3')
+        return self._client
+
+    @property
+    def transfer_config(self):
+        if self._transfer_config is None:
+            import boto3.s3.transfer as s3t
+            self._transfer_config = s3t.TransferConfig(**DEFAULT_TRANSFER_SETTINGS)
+        return self._transfer_config
 
     def __iter__(self) -> t.Iterator[Entry]:
+        self._entries = {}
         token = None
         while True:
             args = {
@@ -67,29 +112,107 @@ class S3Repo:
 
             for entry in response.get('Contents', []):
                 key = entry['Key'][len(self.prefix):]
-                yield Entry(key, entry['ETag'].strip('"'))
+                e = Entry(key, self.content_id(entry['Key'], entry['ETag'].strip('"')))
+                self._entries[key] = e
+                yield e
             token = response.get('NextContinuationToken')
             if token is None:
                 break
 
+        self._multipart_ids = {k: v for k, v in self._multipart_ids.items() if k[0] in self._entries}
+
+    def content_id(self, key: str, etag: str) -> str:
+        # The ETag of a single part upload is the md5 of the content, but a multipart one isn't, so look up the md5
+        # we stored on upload instead.  Lookups are cached by ETag, so each object is only checked once.
+        if not is_multipart(etag):
+            return etag
+
+        import botocore.exceptions as bc
+
+        path = key[len(self.prefix):]
+        if (path, etag) not in self._multipart_ids:
+            try:
+                metadata = self.client.head_object(Bucket=self.bucket, Key=key).get('Metadata', {})
+            except bc.ClientError:
+                log.warning("Problem reading metadata of %r from %r, comparing by ETag", key, self)
+                return etag
+            self._multipart_ids[(path, etag)] = metadata_content_id(etag, metadata)
+        return self._multipart_ids[(path, etag)]
+
     def contents(self, path: str):
         try:
             obj = self.client.get_object(Bucket=self.bucket, Key=f'{self.prefix}{path}')
 
-            return Contents(path, obj['ETag'].strip('"'), obj['Body'])
+            content_id = metadata_content_id(obj['ETag'].strip('"'), obj.get('Metadata', {}))
+            return Contents(path, content_id, obj['Body'], obj.get('ContentLength'))
         except self.client.exceptions.NoSuchKey:
             raise KeyError(f"Object '{path}' not found in {self.name}")
 
+    def write(self, contents: Contents) -> bool:
+        import boto3.s3.transfer as s3t
+        import botocore.exceptions as bc
+
+        try:
+            self.client.upload_fileobj(
+                contents.body, self.bucket, f'{self.prefix}{contents.path}',
+                ExtraArgs={'Metadata': {MD5_METADATA_KEY: contents.content_id}},
+                Config=self.transfer_config,
+            )
+            self._entries[contents.path] = Entry(contents.path, contents.content_id)
+            return True
+        except (bc.BotoCoreError, bc.ClientError, s3t.S3UploadFailedError):
+            log.exception("Problem writing %r to %r", contents.path, self)
+            return False
+
+    def delete(self, path: str) -> bool:
+        return self.delete_many([path])[path]
+
+    def delete_many(self, paths: t.Iterable[str]) -> t.Dict[str, bool]:
+        paths = list(paths)
+        results = {}
+        for i in range(0, len(paths), self.max_delete_keys):
+            batch = paths[i:i + self.max_delete_keys]
+            results.update(self._delete_batch(batch))
+        return results
+
+    def _delete_batch(self, paths: t.List[str]) -> t.Dict[str, bool]:
+        import botocore.exceptions as bc
+
+        try:
+            response = self.client.delete_objects(
+                Bucket=self.bucket,
+                Delete={'Objects': [{'Key': f'{self.prefix}{path}'} for path in paths], 'Quiet': True},
+            )
+        except (bc.BotoCoreError, bc.ClientError):
+            log.exception("Problem deleting %d objects from %r", len(paths), self)
+            return {path: False for path in paths}
+
+        results = {path: True for path in paths}
+        for error in response.get('Errors', []):
+            path = error['Key'][len(self.prefix):]
+            log.error("Problem deleting %r from %r: %s", path, self, error.get('Message'))
+            results[path] = False
+
+        for path, success in results.items():
+            if success:
+                self._entries.pop(path, None)
+        return results
+
+    def get(self, path):
+        return self._entries.get(path)
+
     def __repr__(self):
         return f"{self.__class__.__name__}({self.name!r}, uri={self.uri!r})"
 
 
 class LocalFSRepo:
-    def __init__(self, name: str, root: str, staging: str):
+    def __init__(self, name: str, root: str, staging: str, delete_workers=8):
         self.name = name
         self.root = root
         self.staging = staging
+        self.delete_workers = delete_workers
         self._entries = None
+        self._digests = {}
 
     @property
     def entries(self):
@@ -103,13 +226,33 @@ class LocalFSRepo:
             prefix = dirpath[len(self.root) + 1:]
             for fn in filenames:
                 path = os.path.join(prefix, fn)
-                md5 = self.md5_file(path)
+                md5 = self.digest(path)
                 yield Entry(path, md5)
 
+    def rescan(self):
+        self._entries = {e.path: e for e in self.walk_repo()}
+        self._digests = {path: d for path, d in self._digests.items() if path in self._entries}
+
+    def digest(self, path: str) -> str:
+        # Only re-read files whose size or mtime changed since we last hashed them
+        stamp = self.stamp(path)
+        cached = self._digests.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+        md5 = self.md5_file(path)
+        self._digests[path] = (stamp, md5)
+        return md5
+
+    def stamp(self, path: str) -> t.Tuple[int, int]:
+        st = os.stat(self.fullpath(path))
+        return (st.st_size, st.st_mtime_ns)
+
     def contents(self, path):
         if path in self.entries:
             entry = self.entries[path]
-            return Contents(entry.path, entry.content_id, open(self.fullpath(path), "rb"))
+            body = open(self.fullpath(path), "rb")
+            return Contents(entry.path, entry.content_id, body, os.fstat(body.fileno()).st_size)
         else:
             raise KeyError(f"Object '{path}' not found in {self.name}")
 
@@ -143,6 +286,7 @@ class LocalFSRepo:
             os.makedirs(dirname, exist_ok=True)
             shutil.move(temp_path, full_path)
             self.entries[contents.path] = Entry(contents.path, contents.content_id)
+            self._digests[contents.path] = (self.stamp(contents.path), contents.content_id)
             return True
         except OSError:
             log.exception("Problem writing %r to %r", contents.path, self)
@@ -151,12 +295,32 @@ class LocalFSRepo:
             return False
 
     def delete(self, path: str) -> bool:
-        try:
-            os.remove(self.fullpath(path))
+        return self.delete_many([path])[path]
+
+    def delete_many(self, paths: t.Iterable[str]) -> t.Dict[str, bool]:
+        by_directory = collections.defaultdict(list)
+        for path in paths:
+            by_directory[os.path.dirname(path)].append(path)
+
+        results = {}
+        with cf.ThreadPoolExecutor(max_workers=self.delete_workers) as pool:
+            for batch in pool.map(self._delete_batch, by_directory.values()):
+                results.update(batch)
 
-            if path in self.entries:
-                del self.entries[path]
+        for path, success in results.items():
+            if success:
+                self.entries.pop(path, None)
+                self._digests.pop(path, None)
 
+        self.prune_directories(by_directory.keys())
+        return results
+
+    def _delete_batch(self, paths: t.List[str]) -> t.Dict[str, bool]:
+        return {path: self._remove(path) for path in paths}
+
+    def _remove(self, path: str) -> bool:
+        try:
+            os.remove(self.fullpath(path))
             return True
         except FileNotFoundError:
             return True
@@ -164,6 +328,16 @@ class LocalFSRepo:
             log.exception("Problem deleting %r from %r", path, self)
             return False
 
+    def prune_directories(self, directories: t.Iterable[str]):
+        # Remove directories left empty, deepest first so each chain is cleared bottom-up.  The root itself is kept.
+        for directory in sorted(directories, key=lambda d: d.count(os.sep), reverse=True):
+            while directory:
+                try:
+                    os.rmdir(self.fullpath(directory))
+                except OSError:
+                    break
+                directory = os.path.dirname(directory)
+
     def ensure_directories(self):
         os.makedirs(self.root, exist_ok=True)
         os.makedirs(self.staging, exist_ok=True)
@@ -1,7 +1,11 @@
 import collections
+import concurrent.futures as cf
+import dataclasses as dc
 import fnmatch
 import logging
 import re
+import threading
+import time
 import typing as t
 
 import s3insync.operations as op
@@ -9,54 +13,192 @@ import s3insync.operations as op
 
 log = logging.getLogger(__name__)
 
+MB = 1024 * 1024
+
+
+@dc.dataclass()
+class Progress:
+    started: float = dc.field(default_factory=time.monotonic)
+    first_transfer: t.Optional[float] = None
+    finished: t.Optional[float] = None
+    files: int = 0
+    bytes: int = 0
+    _lock: threading.Lock = dc.field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def transferred(self, size: t.Optional[int]):
+        with self._lock:
+            if self.first_transfer is None:
+                self.first_transfer = time.monotonic()
+            self.files += 1
+            self.bytes += size or 0
+
+    def finish(self):
+        self.finished = time.monotonic()
+
+    @property
+    def time_to_first_transfer(self) -> t.Optional[float]:
+        if self.first_transfer is None:
+            return None
+        return self.first_transfer - self.started
+
+    @property
+    def duration(self) -> float:
+        end = self.finished if self.finished is not None else time.monotonic()
+        return end - self.started
+
+    def summary(self) -> str:
+        duration = self.duration
+        elapsed = duration if duration > 0 else float('inf')
+        summary = (f"Transferred {self.files} files ({self.bytes / MB:.1f} MiB) in {duration:.2f}s: "
+                   f"{self.files / elapsed:.1f} files/s, {self.bytes / MB / elapsed:.1f} MiB/s")
+        if self.first_transfer is not None:
+            summary += f", first transfer after {self.time_to_first_transfer:.2f}s"
+        return summary
+
+
+class RateLimit:
+    def __init__(self, per_second: float, clock=time.monotonic):
+        self.per_second = per_second
+        self.clock = clock
+        self.window = None
+        self.count = 0
+        self.suppressed = 0
+
+    def allow(self) -> bool:
+        now = self.clock()
+        if self.window is None or now - self.window >= 1:
+            self.window = now
+            self.count = 0
+        self.count += 1
+        if self.count > self.per_second:
+            self.suppressed += 1
+            return False
+        return True
+
 
 class SyncDecider:
-    def __init__(self, excludes=None):
-        if excludes is not None:
+    max_pending_per_worker = 64
+    max_traced_paths = 10
+
+    def __init__(self, excludes=None, slow_threshold=None, entry_logs_per_second=100):
+        if excludes:
             self.excludes = re.compile('|'.join(map(fnmatch.translate, excludes)))
         else:
             self.excludes = None
+        self.slow_threshold = slow_threshold
+        self.entry_logs_per_second = entry_logs_per_second
 
     def sync(self, from_repo, to_repo):
+        limit = RateLimit(self.entry_logs_per_second)
         seen_paths = {e.path: False for e in to_repo}
         for entry in from_repo:
             path = entry.path
 
             if self.entry_excluded(path):
-                log.debug("entry=%r status='excluded' action='ignore'", entry)
+                self.log_entry(limit, entry, 'excluded', 'ignore')
                 yield op.Excluded(path, from_repo, to_repo)
                 continue
 
             if path not in seen_paths:
-                log.debug("entry=%r status='new' action='pull'", entry)
+                self.log_entry(limit, entry, 'new', 'pull')
                 yield op.Copy(path, from_repo, to_repo)
             elif path in seen_paths and entry != to_repo.get(path):
-                log.debug("entry=%r status='updated' action='pull'", entry)
+                self.log_entry(limit, entry, 'updated', 'pull')
                 yield op.Copy(path, from_repo, to_repo)
             else:
-                log.debug("entry=%r status='in sync' action='nop'", entry)
+                self.log_entry(limit, entry, 'in sync', 'nop')
                 yield op.Nop(path, from_repo, to_repo)
 
             seen_paths[entry.path] = True
 
         for entry, seen in seen_paths.items():
             if seen is False and not self.entry_excluded(entry):
-                log.debug("entry=%r status='gone' action='delete'", entry)
+                self.log_entry(limit, entry, 'gone', 'delete')
                 yield op.Delete(entry, from_repo, to_repo)
 
-    def execute_sync(self, from_repo, to_repo) -> t.Dict[str, int]:
+        if limit.suppressed:
+            log.debug("Suppressed %d entry log lines over %g per second", limit.suppressed, limit.per_second)
+
+    def log_entry(self, limit: RateLimit, entry, status: str, action: str):
+        # Logging every entry of a large repo is itself slow, so cap it when debugging
+        if log.isEnabledFor(logging.DEBUG) and limit.allow():
+            log.debug("entry=%r status='%s' action='%s'", entry, status, action)
+
+    def execute_sync(self, from_repo, to_repo, workers=1, progress=None) -> t.Dict[str, int]:
+        # Copies run on a pool while sync() is still listing from_repo, so transfers start as soon as the first page
+        # of entries arrives.  Deletes wait until every copy is done, as before.
         successes = collections.Counter()
         failures = collections.Counter()
-        for operation in self.sync(from_repo, to_repo):
-            success = operation.execute()
-            if not success:
-                failures[operation.name] += 1
-                log.error(f"Failed to execute {operation}")
-            successes[operation.name] += 1
-            successes['total'] += 1
+        deletes = []
+        max_pending = workers * self.max_pending_per_worker
+        with cf.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='s3insync-transfer') as pool:
+            pending = {}
+            for operation in self.sync(from_repo, to_repo):
+                if isinstance(operation, op.Delete) and hasattr(to_repo, 'delete_many'):
+                    deletes.append(operation)
+                elif isinstance(operation, op.Copy):
+                    pending[pool.submit(self.transfer, operation, progress)] = operation
+                    if len(pending) >= max_pending:
+                        self.record_completed(pending, cf.FIRST_COMPLETED, successes, failures)
+                else:
+                    self.record(operation, self.execute(operation), successes, failures)
+
+            self.record_completed(pending, cf.ALL_COMPLETED, successes, failures)
+
+        if deletes:
+            paths = [operation.path for operation in deletes]
+            start = time.monotonic()
+            results = to_repo.delete_many(paths)
+            self.trace_batch("delete", paths, time.monotonic() - start)
+            for operation in deletes:
+                self.record(operation, results[operation.path], successes, failures)
 
         return dict(successes), dict(failures)
 
+    def transfer(self, operation, progress) -> bool:
+        # A single copy going wrong, e.g. the object vanishing after it was listed, is a failed copy rather than a
+        # failed sync, so the other copies and the deletes still happen
+        try:
+            success = self.execute(operation)
+        except Exception:
+            log.exception("Problem executing %r", operation)
+            return False
+        if success and progress is not None:
+            progress.transferred(operation.size)
+        return success
+
+    def execute(self, operation) -> bool:
+        start = time.monotonic()
+        try:
+            return operation.execute()
+        finally:
+            self.trace(operation.name, operation.path, getattr(operation, 'size', None), time.monotonic() - start)
+
+    def trace(self, name: str, path: str, size: t.Optional[int], duration: float):
+        if self.slow_threshold is not None and duration >= self.slow_threshold:
+            log.warning("slow operation=%r path=%r size=%r duration=%.3fs", name, path, size, duration)
+
+    def trace_batch(self, name: str, paths: t.List[str], duration: float):
+        if self.slow_threshold is not None and duration >= self.slow_threshold:
+            # Batches can hold thousands of keys, so only name the first few
+            shown = ', '.join(map(repr, paths[:self.max_traced_paths]))
+            if len(paths) > self.max_traced_paths:
+                shown += ', ...'
+            log.warning("slow operation=%r count=%d paths=[%s] duration=%.3fs", name, len(paths), shown, duration)
+
+    def record_completed(self, pending: dict, return_when: str, successes: collections.Counter,
+                         failures: collections.Counter):
+        done, _ = cf.wait(pending, return_when=return_when)
+        for future in done:
+            self.record(pending.pop(future), future.result(), successes, failures)
+
+    def record(self, operation, success: bool, successes: collections.Counter, failures: collections.Counter):
+        if not success:
+            failures[operation.name] += 1
+            log.error(f"Failed to execute {operation}")
+        successes[operation.name] += 1
+        successes['total'] += 1
+
     def entry_excluded(self, entry: str) -> bool:
         if self.excludes is None:
             return False
@@ -0,0 +1,48 @@
+import subprocess
+import sys
+
+
+# Generous, to leave room for slow CI machines; importing boto3 alone takes well over this
+IMPORT_BUDGET_US = 100_000
+
+
+def import_times(code: str) -> dict:
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _self, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_cli_import_is_under_budget():
+    times = import_times('import s3insync.cli')
+
+    assert times['s3insync.cli'] < IMPORT_BUDGET_US
+
+
+def test_cli_import_doesnt_import_boto3_or_prometheus():
+    times = import_times('import s3insync.cli')
+
+    assert 'boto3' not in times
+    assert 'botocore' not in times
+    assert 'prometheus_client' not in times
+
+
+def test_help_doesnt_import_boto3():
+    code = '\n'.join([
+        'import sys',
+        'import s3insync.cli as cli',
+        'sys.argv = ["s3insync", "push", "--help"]',
+        'try:',
+        '    cli.main()',
+        'except SystemExit:',
+        '    pass',
+        'print("boto3" in sys.modules)',
+    ])
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip().endswith('False')
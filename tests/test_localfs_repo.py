@@ -133,3 +133,55 @@ def test_localfs_can_set_up_directories(fake_local_filesystem_empty):
 
     assert os.path.isdir('repository')
     assert os.path.isdir('staging')
+
+
+def test_localfs_repo_rescan_picks_up_new_files(local_repo):
+    list(local_repo)
+    with open("repository/e", "w") as f:
+        f.write("e")
+
+    local_repo.rescan()
+
+    assert local_repo.get('e') == r.Entry("e", "e1671797c52e15f763380b45e841ec32")
+
+
+def test_localfs_repo_rescan_doesnt_reread_unchanged_files(local_repo, monkeypatch):
+    list(local_repo)
+    with open("repository/b", "w") as f:
+        f.write("bb")
+    os.utime("repository/b", ns=(0, 1))
+
+    hashed = []
+    md5_file = local_repo.md5_file
+    monkeypatch.setattr(local_repo, 'md5_file', lambda path: hashed.append(path) or md5_file(path))
+
+    local_repo.rescan()
+
+    assert hashed == ['b']
+    assert local_repo.get('b') == r.Entry("b", "21ad0bd836b90d08f4cf640b4c298e7c")
+
+
+def test_localfs_repo_deletes_many_files_and_prunes_empty_directories(local_repo, fake_local_filesystem):
+    fake_local_filesystem.create_file("repository/f/g/h", contents='h')
+    fake_local_filesystem.create_file("repository/f/i/j", contents='j')
+    fake_local_filesystem.create_file("repository/f/k", contents='k')
+    local_repo.rescan()
+
+    results = local_repo.delete_many(['a', 'f/g/h', 'f/i/j', 'f/k'])
+
+    assert results == {'a': True, 'f/g/h': True, 'f/i/j': True, 'f/k': True}
+    assert not os.path.exists('repository/f')
+    assert os.path.isdir('repository')
+    assert set(local_repo) == {r.Entry("b", "92eb5ffee6ae2fec3ad71c777531578f"),
+                               r.Entry(path='c/d', content_id='8277e0910d750195b448797616e091ad'), }
+
+
+def test_localfs_repo_doesnt_prune_directories_which_still_have_files(local_repo, fake_local_filesystem):
+    fake_local_filesystem.create_file("repository/f/g/h", contents='h')
+    fake_local_filesystem.create_file("repository/f/k", contents='k')
+    local_repo.rescan()
+
+    assert local_repo.delete('f/g/h')
+
+    assert not os.path.exists('repository/f/g')
+    assert os.path.exists('repository/f/k')
@@ -0,0 +1,56 @@
+import os
+import signal
+import threading
+import time
+
+import s3insync.profiling as profiling
+
+
+def busy(until: float):
+    while time.monotonic() < until:
+        pass
+
+
+def run_busy_worker():
+    worker = threading.Thread(target=busy, args=(time.monotonic() + 0.2, ), name='transfer-worker')
+    worker.start()
+    worker.join()
+
+
+def test_profiler_samples_other_threads_and_writes_a_profile(tmp_path):
+    profiler = profiling.SignalProfiler(str(tmp_path), interval=0.001)
+
+    profiler.toggle()
+    run_busy_worker()
+    path = profiler.stop()
+
+    assert os.listdir(tmp_path) == [os.path.basename(path)]
+    with open(path) as f:
+        lines = f.read().splitlines()
+    worker = [line for line in lines if line.startswith('transfer-worker;')]
+    assert worker
+    assert any('busy (' in line for line in worker)
+    assert all(int(line.rsplit(' ', 1)[1]) > 0 for line in lines)
+
+
+def test_profiler_can_be_toggled_by_a_signal(tmp_path):
+    profiler = profiling.SignalProfiler(str(tmp_path))
+    previous = signal.getsignal(signal.SIGUSR1)
+    try:
+        profiler.install()
+
+        os.kill(os.getpid(), signal.SIGUSR1)
+        assert profiler.sampler is not None
+        os.kill(os.getpid(), signal.SIGUSR1)
+        assert profiler.sampler is None
+    finally:
+        signal.signal(signal.SIGUSR1, previous)
+
+    assert len(os.listdir(tmp_path)) == 1
+
+
+def test_stopping_an_idle_profiler_does_nothing(tmp_path):
+    profiler = profiling.SignalProfiler(str(tmp_path))
+
+    assert profiler.stop() is None
+    assert not os.listdir(tmp_path)
@@ -0,0 +1,130 @@
+import argparse
+import os
+import time
+
+import pytest
+
+import s3insync.cmd.pull as pull
+import s3insync.profiling as profiling
+import s3insync.repositories as r
+import s3insync.sync_decider as sd
+
+
+@pytest.fixture()
+def aws_bucket(s3):
+    s3.create_bucket(Bucket="example")
+    for i in range(20):
+        s3.put_object(Bucket="example", Key=f"path/{i:02}", Body=b'x' * 100)
+    return s3
+
+
+@pytest.fixture()
+def home(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path / 'home'))
+    return tmp_path
+
+
+def once_args(localpath, **kwargs):
+    args = {'s3uri': 's3://example/path', 'localpath': localpath, 'exclude': [], 'workers': 4, 'once': True,
+            'profile': False, 'slow_threshold': None, 'debug_entries_per_second': 100}
+    args.update(kwargs)
+    return argparse.Namespace(**args)
+
+
+def test_run_once_seeds_an_empty_directory(aws_bucket, home, capsys):
+    localpath = str(home / 'local')
+
+    assert pull.run_once(once_args(localpath)) == 0
+
+    assert sorted(os.listdir(localpath)) == [f'{i:02}' for i in range(20)]
+    assert capsys.readouterr().out.startswith("Transferred 20 files")
+
+
+def test_run_exits_with_run_once_status(aws_bucket, home):
+    with pytest.raises(SystemExit) as exit:
+        pull.run(once_args(str(home / 'local')))
+
+    assert exit.value.code == 0
+
+
+def test_run_once_is_non_zero_if_anything_fails(aws_bucket, home, monkeypatch):
+    monkeypatch.setattr(r.LocalFSRepo, 'write', lambda self, contents: False)
+
+    assert pull.run_once(once_args(str(home / 'local'))) == 1
+
+
+def test_run_once_is_non_zero_if_the_sync_cant_complete(aws_bucket, home):
+    assert pull.run_once(once_args(str(home / 'local'), s3uri='s3://missing/path')) == 2
+
+
+def test_run_once_writes_a_profile_if_profiling_was_started(aws_bucket, home, monkeypatch):
+    monkeypatch.setattr(profiling.SignalProfiler, 'install', profiling.SignalProfiler.start)
+
+    assert pull.run_once(once_args(str(home / 'local'), profile=True)) == 0
+
+    profiles = os.listdir(home / 'home' / '.s3insync')
+    assert len(profiles) == 1
+    assert profiles[0].endswith('.stacks')
+
+
+def test_cold_seed_starts_transferring_before_listing_finishes(aws_bucket, tmp_path):
+    # Benchmark for cold seeding: checks the first transfer lands before listing finishes.  Run with -s or -rP to
+    # see time to first transfer and total wall time.
+    src = r.S3Repo('s3', 's3://example/path', aws_bucket, maxkeys=2)
+    dest = r.LocalFSRepo('fs', str(tmp_path / 'local'), str(tmp_path / 'staging'))
+    dest.ensure_directories()
+
+    list_objects_v2 = aws_bucket.list_objects_v2
+    listed = []
+
+    def timed_list_objects_v2(**kwargs):
+        response = list_objects_v2(**kwargs)
+        listed.append(time.monotonic())
+        return response
+
+    src._client = argparse.Namespace(list_objects_v2=timed_list_objects_v2, get_object=aws_bucket.get_object,
+                                     head_object=aws_bucket.head_object, exceptions=aws_bucket.exceptions)
+    progress = sd.Progress()
+
+    sd.SyncDecider().execute_sync(src, dest, workers=4, progress=progress)
+    progress.finish()
+    print(f"cold seed benchmark: {progress.summary()}")
+
+    assert progress.files == 20
+    assert progress.first_transfer < listed[-1]
+
+
+def test_run_once_is_one_if_an_object_vanishes_after_listing(aws_bucket, home, monkeypatch, capsys):
+    contents = r.S3Repo.contents
+
+    def vanishing_contents(self, path):
+        if path == '03':
+            raise KeyError(f"Object '{path}' not found in {self.name}")
+        return contents(self, path)
+
+    monkeypatch.setattr(r.S3Repo, 'contents', vanishing_contents)
+    localpath = str(home / 'local')
+
+    assert pull.run_once(once_args(localpath)) == 1
+
+    assert len(os.listdir(localpath)) == 19
+    assert capsys.readouterr().out.startswith("Transferred 19 files")
+
+
+def test_an_object_whose_etag_isnt_its_md5_is_only_copied_once(s3, tmp_path):
+    # Stands in for a single part object under SSE-KMS, whose ETag isn't the md5 we stored on upload
+    s3.create_bucket(Bucket="example")
+    s3.put_object(Bucket="example", Key="path/a", Body=b'a', Metadata={r.MD5_METADATA_KEY: 'not-the-etag'})
+    src = r.S3Repo('s3', 's3://example/path', s3)
+    dest = r.LocalFSRepo('fs', str(tmp_path / 'local'), str(tmp_path / 'staging'))
+    dest.ensure_directories()
+    syncd = sd.SyncDecider()
+
+    assert syncd.execute_sync(src, dest) == ({'copy': 1, 'total': 1}, {})
+    assert syncd.execute_sync(src, dest) == ({'nop': 1, 'total': 1}, {})
+
+
+def test_run_once_is_two_if_the_directories_cant_be_set_up(aws_bucket, home):
+    (home / 'local').write_text('not a directory')
+
+    assert pull.run_once(once_args(str(home / 'local'))) == 2
@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+import s3insync.repositories as r
+import s3insync.sync_decider as sd
+
+
+@pytest.fixture()
+def bucket(s3):
+    s3.create_bucket(Bucket="example")
+    return s3
+
+
+@pytest.fixture()
+def local_dir(tmp_path):
+    root = tmp_path / 'local'
+    for path in ('a', 'b', 'c/d'):
+        os.makedirs(os.path.dirname(root / path), exist_ok=True)
+        (root / path).write_text(path)
+    return root
+
+
+@pytest.fixture()
+def repos(bucket, local_dir, tmp_path):
+    src = r.LocalFSRepo('fs', str(local_dir), str(tmp_path / 'staging'))
+    dest = r.S3Repo('s3', 's3://example/path', bucket)
+    return src, dest
+
+
+def keys(s3):
+    return sorted(o['Key'] for o in s3.list_objects_v2(Bucket="example").get('Contents', []))
+
+
+def test_push_uploads_new_files(s3, repos):
+    src, dest = repos
+
+    successes, failures = sd.SyncDecider([]).execute_sync(src, dest)
+
+    assert successes == {'copy': 3, 'total': 3}
+    assert not failures
+    assert keys(s3) == ['path/a', 'path/b', 'path/c/d']
+    assert s3.get_object(Bucket="example", Key="path/c/d")['Body'].read() == b'c/d'
+
+
+def test_push_doesnt_reread_or_reupload_unchanged_files(s3, repos, monkeypatch):
+    src, dest = repos
+    syncd = sd.SyncDecider([])
+    syncd.execute_sync(src, dest)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("unchanged files shouldn't be read or uploaded")
+
+    monkeypatch.setattr(src, 'md5_file', fail)
+    monkeypatch.setattr(dest, 'write', fail)
+
+    src.rescan()
+    successes, failures = syncd.execute_sync(src, dest)
+
+    assert successes == {'nop': 3, 'total': 3}
+    assert not failures
+
+
+def test_push_deletes_removed_files_in_batches(s3, repos, local_dir, monkeypatch):
+    src, dest = repos
+    syncd = sd.SyncDecider([])
+    syncd.execute_sync(src, dest)
+
+    dest.max_delete_keys = 2
+    calls = []
+    delete_objects = s3.delete_objects
+    monkeypatch.setattr(s3, 'delete_objects', lambda **kwargs: calls.append(kwargs) or delete_objects(**kwargs))
+
+    for path in ('a', 'b', 'c/d'):
+        os.remove(local_dir / path)
+    src.rescan()
+    successes, failures = syncd.execute_sync(src, dest)
+
+    assert successes == {'delete': 3, 'total': 3}
+    assert not failures
+    assert [len(call['Delete']['Objects']) for call in calls] == [2, 1]
+    assert keys(s3) == []
+
+
+def test_push_can_upload_in_parallel(s3, repos):
+    src, dest = repos
+
+    successes, failures = sd.SyncDecider([]).execute_sync(src, dest, workers=3)
+
+    assert successes == {'copy': 3, 'total': 3}
+    assert not failures
+    assert keys(s3) == ['path/a', 'path/b', 'path/c/d']
@@ -1,27 +1,12 @@
-import os
+import hashlib
+import io
 
-import boto3
-import moto
+import boto3.s3.transfer as s3t
 import pytest
 
 import s3insync.repositories as r
 
 
-@pytest.fixture(scope='function')
-def aws_credentials():
-    """Mocked AWS Credentials for moto."""
-    os.environ['AWS_ACCESS_KEY_ID'] = 'testing'
-    os.environ['AWS_SECRET_ACCESS_KEY'] = 'testing'
-    os.environ['AWS_SECURITY_TOKEN'] = 'testing'
-    os.environ['AWS_SESSION_TOKEN'] = 'testing'
-
-
-@pytest.fixture(scope='function')
-def s3(aws_credentials):
-    with moto.mock_s3():
-        yield boto3.client('s3', region_name='us-east-1')
-
-
 @pytest.fixture()
 def aws_bucket(s3):
     s3.create_bucket(Bucket="example")
@@ -46,6 +31,12 @@ def test_aws_repo_takes_name_s3uri():
     assert aws.uri == "s3://example/path"
 
 
+def test_aws_repo_defers_creating_a_client():
+    aws = r.S3Repo("aws", "s3://example/path")
+
+    assert aws._client is None
+
+
 def test_aws_repo_takes_name_s3uri_client(s3):
     aws = r.S3Repo("aws", "s3://example/path", s3)
 
@@ -101,3 +92,72 @@ def test_aws_repo_entries_works_with_empty_bucket(aws_bucket):
     entries = set(repo)
 
     assert not entries
+
+
+def test_aws_repo_can_get_an_entry_after_listing(aws_ab_repo):
+    set(aws_ab_repo)
+
+    assert aws_ab_repo.get('a') == r.Entry("a", "0cc175b9c0f1b6a831c399e269772661")
+    assert aws_ab_repo.get('e') is None
+
+
+def test_aws_repo_allows_writing_to_path(aws_ab_repo):
+    assert aws_ab_repo.write(r.Contents("e", "e1671797c52e15f763380b45e841ec32", io.BytesIO(b'e')))
+
+    assert aws_ab_repo.contents('e').read() == b'e'
+    assert r.Entry("e", "e1671797c52e15f763380b45e841ec32") in set(aws_ab_repo)
+
+
+def test_aws_repo_writes_large_files_in_parts_and_lists_them_by_md5(aws_bucket):
+    config = s3t.TransferConfig(multipart_threshold=5 * r.MB, multipart_chunksize=5 * r.MB)
+    repo = r.S3Repo("aws", "s3://example/path", aws_bucket, transfer_config=config)
+    body = b'e' * (11 * r.MB)
+    md5 = hashlib.md5(body).hexdigest()
+
+    assert repo.write(r.Contents("big", md5, io.BytesIO(body)))
+
+    etag = aws_bucket.head_object(Bucket="example", Key="path/big")['ETag']
+    assert '-' in etag
+    assert r.Entry("big", md5) in set(repo)
+    assert repo.contents("big").content_id == md5
+
+
+def test_aws_repo_allows_deleting_files(aws_ab_repo):
+    set(aws_ab_repo)
+
+    assert aws_ab_repo.delete('a')
+
+    assert set(aws_ab_repo) == {r.Entry("b", "92eb5ffee6ae2fec3ad71c777531578f"),
+                                r.Entry("c/d", "e1671797c52e15f763380b45e841ec32"),
+                                }
+
+
+def test_aws_repo_deletes_many_files_in_batches(aws_ab_repo):
+    aws_ab_repo.max_delete_keys = 2
+
+    results = aws_ab_repo.delete_many(['a', 'b', 'c/d'])
+
+    assert results == {'a': True, 'b': True, 'c/d': True}
+    assert not set(aws_ab_repo)
+
+
+def test_aws_repo_falls_back_to_the_etag_if_an_object_vanishes_while_listing(aws_bucket):
+    repo = r.S3Repo("aws", "s3://example/path", aws_bucket)
+    aws_bucket.delete_object(Bucket="example", Key="path/c/d")
+
+    assert repo.content_id("path/c/d", "abc-2") == "abc-2"
+    assert not repo._multipart_ids
+
+
+def test_aws_repo_only_caches_multipart_ids_of_listed_objects(aws_bucket):
+    config = s3t.TransferConfig(multipart_threshold=5 * r.MB, multipart_chunksize=5 * r.MB)
+    repo = r.S3Repo("aws", "s3://example/path", aws_bucket, transfer_config=config)
+    body = b'e' * (6 * r.MB)
+    repo.write(r.Contents("big", hashlib.md5(body).hexdigest(), io.BytesIO(body)))
+    set(repo)
+    assert [path for path, _etag in repo._multipart_ids] == ["big"]
+
+    aws_bucket.delete_object(Bucket="example", Key="path/big")
+    set(repo)
+
+    assert not repo._multipart_ids
@@ -1,3 +1,6 @@
+import io
+import logging
+
 import s3insync.sync_decider as sd
 import s3insync.repositories as r
 import s3insync.operations as o
@@ -71,3 +74,149 @@ def test_a_present_file_whose_content_has_changed_will_be_synced():
     ops = list(syncd.sync(from_repo, to_repo))
 
     assert ops == [o.Copy("a", from_repo, to_repo)]
+
+
+class DeletableRepo(r.TestRepo):
+    def __init__(self, name, entries=None):
+        super().__init__(name, entries)
+        self.deleted = []
+
+    def delete_many(self, paths):
+        self.deleted.append(list(paths))
+        return {path: path != "c" for path in paths}
+
+
+def test_deletes_are_batched_if_the_repo_supports_it():
+    syncd = sd.SyncDecider()
+    from_repo = r.TestRepo("from", ["a"])
+    to_repo = DeletableRepo("to", ["a", "b", "c"])
+
+    successes, failures = syncd.execute_sync(from_repo, to_repo)
+
+    assert to_repo.deleted == [["b", "c"]]
+    assert successes == {"nop": 1, "delete": 2, "total": 3}
+    assert failures == {"delete": 1}
+
+
+class CopyableRepo(r.TestRepo):
+    def contents(self, path):
+        return r.Contents(path, self.entries[path].content_id, io.BytesIO(path.encode()), len(path))
+
+    def write(self, contents):
+        self.add_entry(r.Entry(contents.path, contents.content_id))
+        return contents.path != "c"
+
+
+def test_copies_can_run_in_parallel():
+    syncd = sd.SyncDecider()
+    syncd.max_pending_per_worker = 1
+    from_repo = CopyableRepo("from", ["a", "bb", "c", "d"])
+    to_repo = CopyableRepo("to", ["d"])
+    progress = sd.Progress()
+
+    successes, failures = syncd.execute_sync(from_repo, to_repo, workers=2, progress=progress)
+
+    assert successes == {"copy": 3, "nop": 1, "total": 4}
+    assert failures == {"copy": 1}
+    assert set(to_repo.entries) == {"a", "bb", "c", "d"}
+    assert progress.files == 2
+    assert progress.bytes == 3
+    assert progress.time_to_first_transfer is not None
+
+
+def test_progress_summarises_throughput():
+    progress = sd.Progress(started=0.0)
+    progress.transferred(2 * sd.MB)
+    progress.first_transfer = 0.5
+    progress.finished = 2.0
+
+    assert progress.summary() == ("Transferred 1 files (2.0 MiB) in 2.00s: 0.5 files/s, 1.0 MiB/s, "
+                                  "first transfer after 0.50s")
+
+
+def test_an_empty_list_of_excludes_excludes_nothing():
+    syncd = sd.SyncDecider(excludes=[])
+    from_repo = r.TestRepo("from", ["a"])
+    to_repo = r.TestRepo("to")
+
+    ops = list(syncd.sync(from_repo, to_repo))
+
+    assert ops == [o.Copy("a", from_repo, to_repo)]
+
+
+def test_slow_operations_are_logged(caplog):
+    syncd = sd.SyncDecider(slow_threshold=0)
+    from_repo = CopyableRepo("from", ["a"])
+    to_repo = CopyableRepo("to")
+
+    syncd.execute_sync(from_repo, to_repo)
+
+    assert "slow operation='copy' path='a' size=1" in caplog.text
+
+
+def test_entry_debug_logs_are_rate_limited(caplog):
+    caplog.set_level(logging.DEBUG, logger=sd.__name__)
+    syncd = sd.SyncDecider(entry_logs_per_second=1)
+    from_repo = r.TestRepo("from", ["a", "b", "c"])
+    to_repo = r.TestRepo("to")
+
+    list(syncd.sync(from_repo, to_repo))
+
+    entries = [m for m in caplog.messages if m.startswith("entry=")]
+    assert entries == ["entry=Entry(path='a', content_id='a') status='new' action='pull'"]
+    assert "Suppressed 2 entry log lines over 1 per second" in caplog.messages
+
+
+def test_rate_limit_resets_every_second():
+    now = [0.0]
+    limit = sd.RateLimit(1, clock=lambda: now[0])
+
+    assert limit.allow()
+    assert not limit.allow()
+    now[0] = 1.0
+    assert limit.allow()
+    assert limit.suppressed == 1
+
+
+class VanishingRepo(CopyableRepo):
+    def contents(self, path):
+        if path == "b":
+            raise KeyError(f"Object '{path}' not found in {self.name}")
+        return super().contents(path)
+
+
+class CopyableDeletableRepo(CopyableRepo, DeletableRepo):
+    pass
+
+
+def test_a_copy_which_raises_is_a_failed_copy():
+    syncd = sd.SyncDecider()
+    from_repo = VanishingRepo("from", ["a", "b"])
+    to_repo = CopyableDeletableRepo("to", ["z"])
+
+    successes, failures = syncd.execute_sync(from_repo, to_repo, workers=2)
+
+    assert successes == {"copy": 2, "delete": 1, "total": 3}
+    assert failures == {"copy": 1}
+    assert to_repo.deleted == [["z"]]
+
+
+def test_slow_batched_deletes_are_logged_with_their_keys(caplog):
+    syncd = sd.SyncDecider(slow_threshold=0)
+    from_repo = r.TestRepo("from", ["a"])
+    to_repo = DeletableRepo("to", ["a", "b", "c"])
+
+    syncd.execute_sync(from_repo, to_repo)
+
+    assert "slow operation='delete' count=2 paths=['b', 'c']" in caplog.text
+
+
+def test_slow_batched_deletes_only_log_the_first_few_keys(caplog):
+    syncd = sd.SyncDecider(slow_threshold=0)
+    syncd.max_traced_paths = 2
+    from_repo = r.TestRepo("from", ["a"])
+    to_repo = DeletableRepo("to", ["a", "b", "c", "d"])
+
+    syncd.execute_sync(from_repo, to_repo)
+
+    assert "slow operation='delete' count=3 paths=['b', 'c', ...]" in caplog.text